@@ -8,6 +8,8 @@ M.description = "Template agent that delegates to a Python JSON-IO runner (LangG
 -- Set adapter to python and point to your runner script
 M.adapter = "python"
 M.command = "python3 /absolute/path/to/python/agent_runner.py"
+-- Or use a compiled runner (`make -C python runner`) for faster start-up:
+-- M.command = "/absolute/path/to/python/dist/agent_runner.dist/agent_runner"
 
 -- Optional: arguments to pass to the runner process
 M.args = { }
@@ -18,4 +20,8 @@ M.prompt = "You are a helpful code assistant running in Python."
 -- Optional: tool/response iterations
 M.max_iters = 3
 
+-- Optional: keep one runner process alive for the whole session instead of
+-- spawning it per turn (the runner is started with --persistent)
+M.persistent = false
+
 return M
\ No newline at end of file
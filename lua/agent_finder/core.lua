@@ -1387,6 +1387,56 @@ if not curl_available then
   curl = nil  -- Will use system curl fallback
 end
 
+-- Long-lived python runners (agent.persistent = true), keyed by full command.
+-- Requests and responses are exchanged as one JSON document per line.
+M._python_procs = M._python_procs or {}
+
+local function get_python_proc(full_cmd)
+  local proc = M._python_procs[full_cmd]
+  if proc then
+    return proc
+  end
+  -- The runner answers strictly in order, so callbacks are queued FIFO
+  proc = { partial = '', stderr = {}, queue = {} }
+  local job = vim.fn.jobstart(full_cmd, {
+    on_stdout = function(_, data)
+      if not data then return end
+      -- data[1] continues the previous chunk; the last item is an incomplete line
+      data[1] = proc.partial .. data[1]
+      proc.partial = table.remove(data)
+      for _, line in ipairs(data) do
+        if line ~= '' and #proc.queue > 0 then
+          local on_line = table.remove(proc.queue, 1)
+          on_line(line)
+        end
+      end
+    end,
+    on_stderr = function(_, data)
+      for _, line in ipairs(data or {}) do
+        if line ~= '' then table.insert(proc.stderr, line) end
+      end
+    end,
+    on_exit = function(_, code)
+      debug_log("Python runner exited:", full_cmd, code)
+      if M._python_procs[full_cmd] == proc then
+        M._python_procs[full_cmd] = nil
+      end
+      local text = table.concat(proc.stderr, '\n')
+      local queue = proc.queue
+      proc.queue = {}
+      for _, on_line in ipairs(queue) do
+        on_line(nil, text ~= '' and text or 'Python agent process exited')
+      end
+    end,
+  })
+  if job <= 0 then
+    return nil
+  end
+  proc.job = job
+  M._python_procs[full_cmd] = proc
+  return proc
+end
+
 -- Python adapter: JSON-IO subprocess runner
 function M._generate_python_response_async(agent, user_message, chat_history, callback)
   local cmd = agent.command
@@ -1400,6 +1450,32 @@ function M._generate_python_response_async(agent, user_message, chat_history, ca
   end
   table.insert(input_list, { role = 'user', content = user_message or '' })
 
+  local function run_persistent(full_cmd, stdin_data, on_done)
+    local proc = get_python_proc(full_cmd .. ' --persistent')
+    if not proc then
+      on_done({ success = false, error = 'Failed to start python agent process' })
+      return
+    end
+    -- Only drop stale stderr when no other request is still waiting
+    if #proc.queue == 0 then
+      proc.stderr = {}
+    end
+    table.insert(proc.queue, function(line, err)
+      if not line then
+        on_done({ success = false, error = err })
+        return
+      end
+      local ok, decoded = pcall(vim.fn.json_decode, line)
+      if not ok then
+        on_done({ success = false, error = 'Invalid JSON from python agent' })
+        return
+      end
+      on_done({ success = true, data = decoded })
+    end)
+    -- json_encode escapes newlines, so the payload is always a single line
+    vim.fn.chansend(proc.job, stdin_data .. '\n')
+  end
+
   local function run_once(payload, on_done)
     local stdin_data = vim.fn.json_encode(payload)
     -- Prefer a single command string to ensure stdin piping works
@@ -1407,6 +1483,10 @@ function M._generate_python_response_async(agent, user_message, chat_history, ca
     if args and #args > 0 then
       full_cmd = cmd .. ' ' .. table.concat(args, ' ')
     end
+    if agent.persistent then
+      run_persistent(full_cmd, stdin_data, on_done)
+      return
+    end
     local out = vim.fn.systemlist(full_cmd, stdin_data)
     local text = table.concat(out or {}, '\n')
     if vim.v.shell_error ~= 0 then
@@ -6,37 +6,45 @@ Uses the Python SDK (protocol v1) to communicate with the plugin.
 You can replace the simple policy below with LangChain/LangGraph logic.
 """
 
-import json
+import os
 import sys
-from typing import Any, Dict
 
-try:
-    # Prefer local sdk.py in the same package path
-    from sdk import (
+if __package__:
+    from .sdk import (
         read_request,
         reply,
         call_tool,
         ask_user,
         terminate,
         error,
+        emit,
+        serve,
+        Payload,
         Request,
     )
-except Exception:  # pragma: no cover - fallback if import path differs
-    # Relative import fallback
-    from .sdk import (  # type: ignore
+else:
+    # Run as a script: sdk.py lives next to this file
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from sdk import (
         read_request,
         reply,
         call_tool,
         ask_user,
         terminate,
         error,
+        emit,
+        serve,
+        Payload,
         Request,
     )
 
 
-def build_simple_response(req: Request) -> Dict[str, Any]:
+# Pre-encoded reply for the common "nothing to echo" case
+_DEFAULT_REPLY: Payload = b'{"content":"How can I help you?"}'
+
+
+def build_simple_response(req: Request) -> Payload:
     instructions = req.instructions
-    messages = req.messages
     iteration = req.iteration
 
     # Demo: Ask user on first iteration if buffer path is missing
@@ -52,7 +60,9 @@ def build_simple_response(req: Request) -> Dict[str, Any]:
         )
 
     # Otherwise, reply with a short helpful message
-    last_user = next((m for m in reversed(messages) if m.role == "user"), None)
+    last_user = req.last_user()
+    if not instructions and not last_user:
+        return _DEFAULT_REPLY
     text = last_user.content if last_user else "How can I help you?"
     if instructions:
         text = f"{instructions}\n\n{text}"
@@ -60,19 +70,25 @@ def build_simple_response(req: Request) -> Dict[str, Any]:
 
 
 def main() -> None:
+    # The plugin starts the runner with --persistent when the agent sets
+    # `persistent = true`, then sends one request per line.
+    if "--persistent" in sys.argv[1:]:
+        serve(build_simple_response)
+        return
+
     try:
         req = read_request()
     except Exception as e:
-        sys.stdout.write(json.dumps(error(f"Invalid input JSON: {e}")))
+        emit(error(f"Invalid input JSON: {e}"))
         return
 
     try:
         out = build_simple_response(req)
     except Exception as e:
-        sys.stdout.write(json.dumps(error(f"Runner error: {e}")))
+        emit(error(f"Runner error: {e}"))
         return
 
-    sys.stdout.write(json.dumps(out))
+    emit(out)
 
 
 if __name__ == "__main__":
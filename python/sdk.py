@@ -33,59 +33,144 @@ Output (stdout JSON): exactly ONE of the following top-level objects per turn:
 - { "ask_user": { "message": "question or clarification for user" } }
 - { "terminate": { "message": "optional end note" } }
 - { "error": { "message": "explanation" } }
+
+Input must be UTF-8. It is read as bytes and validated by the JSON parser
+itself (simdjson/orjson), without a separate decode pass.
+
+Persistent mode (serve()): stdin carries one request per line and each
+response is written as a single line, until stdin is closed.
 """
 
 from __future__ import annotations
 
+import array
 import dataclasses
 import json
+import os
 import sys
-from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional
-
-
-PROTOCOL_VERSION = "1.0"
-
-
-@dataclasses.dataclass
+from typing import (
+    Any,
+    Callable,
+    FrozenSet,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Union,
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import simdjson
+except ImportError:  # pragma: no cover - optional speedup
+    simdjson = None  # type: ignore[assignment]
+
+PROTOCOL_VERSION = sys.intern("1.0")
+
+# Roles packed one byte per message (see Request._roles); anything outside the
+# protocol's three roles is coded as _ROLE_OTHER.
+_ROLE_CODES = {"system": 0, "user": 1, "assistant": 2}
+_ROLE_OTHER = 3
+_ROLE_USER = _ROLE_CODES["user"]
+_USER_CODE = bytes([_ROLE_USER])
+
+# One parser per process: simdjson keeps its internal buffers between parses.
+_parser = simdjson.Parser() if simdjson is not None else None
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class Message:
     role: str
     content: str
 
 
-@dataclasses.dataclass
-class BufferContext:
+class BufferContext(NamedTuple):
     path: Optional[str] = None
     filetype: Optional[str] = None
 
 
-@dataclasses.dataclass
-class EditorContext:
+class EditorContext(NamedTuple):
     cwd: Optional[str] = None
 
 
-@dataclasses.dataclass
-class Context:
-    buffer: BufferContext = dataclasses.field(default_factory=BufferContext)
-    editor: EditorContext = dataclasses.field(default_factory=EditorContext)
+class Context(NamedTuple):
+    buffer: BufferContext
+    editor: EditorContext
+
+
+class Tools(Mapping[str, Any]):
+    """Read-only view over the request's tool schemas.
+
+    Membership tests and name listing only touch the keys; a schema is looked
+    up (and, with simdjson, materialized) only when it is asked for.
+    """
+
+    __slots__ = ("_raw", "_names")
+
+    def __init__(self, raw: Mapping[str, Any]) -> None:
+        self._raw = raw
+        self._names: Optional[FrozenSet[str]] = None
+
+    @property
+    def names(self) -> FrozenSet[str]:
+        if self._names is None:
+            self._names = frozenset(self._raw.keys())
+        return self._names
+
+    def schema(self, name: str) -> Optional[Mapping[str, Any]]:
+        return self._raw.get(name)
 
+    def __contains__(self, name: object) -> bool:
+        return name in self.names
 
-@dataclasses.dataclass
+    def __getitem__(self, name: str) -> Any:
+        return self._raw[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._raw.keys())
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __repr__(self) -> str:
+        return f"Tools({sorted(self.names)!r})"
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
 class Request:
+    """A decoded protocol request.
+
+    `messages` and the schemas in `tools` are the decoded JSON values as-is:
+    plain dicts/lists under orjson/json, read-only Mapping/Sequence proxies
+    under simdjson. Treat them as read-only; the builders and emit() accept
+    either kind.
+    """
+
     instructions: str
-    messages: List[Message]
-    tools: Mapping[str, Any]
+    messages: Sequence[Mapping[str, Any]]  # see last_user()
+    tools: Tools
     context: Context
     iteration: int
     protocol_version: str = PROTOCOL_VERSION
+    # Message roles packed into bytes parallel to `messages`, so scans over
+    # the history are single C-level searches (bytes.rfind is memchr-backed).
+    # Only filled once a lookup has had to read every role anyway; turns that
+    # find a user message near the end never pay for the full pass.
+    _roles: Optional[bytes] = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     @staticmethod
     def from_dict(data: Mapping[str, Any]) -> "Request":
         proto = data.get("protocol", {}) or {}
-        pv = str(proto.get("version") or PROTOCOL_VERSION)
-        msgs = [
-            Message(role=str(m.get("role", "user")), content=str(m.get("content", "")))
-            for m in (data.get("messages") or [])
-        ]
+        v = proto.get("version")
+        pv = v if v is PROTOCOL_VERSION else (_as_str(v) if v else PROTOCOL_VERSION)
+        msgs = data.get("messages") or []
         ctx_raw = data.get("context") or {}
         buf = ctx_raw.get("buffer") or {}
         edt = ctx_raw.get("editor") or {}
@@ -96,42 +181,225 @@ class Request:
         return Request(
             instructions=str(data.get("instructions") or ""),
             messages=msgs,
-            tools=data.get("tools") or {},
+            tools=Tools(_as_object(data.get("tools"))),
             context=ctx,
             iteration=int(data.get("iteration") or 1),
             protocol_version=pv,
         )
 
-
-def read_request() -> Request:
-    raw = sys.stdin.read()
-    return Request.from_dict(json.loads(raw or "{}"))
+    def last_user(self) -> Optional[Message]:
+        """Return the most recent user message, or None if there is none."""
+        i = self._last_user_index()
+        if i < 0:
+            return None
+        return Message(role="user", content=_as_str(self.messages[i].get("content", "")))
+
+    def _last_user_index(self) -> int:
+        roles = self._roles
+        if roles is not None:
+            return roles.rfind(_USER_CODE)
+        # The user's message is normally last, so scan back and stop at the
+        # first match rather than packing every role up front.
+        msgs = self.messages
+        seen = bytearray()
+        for i in range(len(msgs) - 1, -1, -1):
+            code = _role_code(msgs[i].get("role", "user"))
+            if code == _ROLE_USER:
+                return i
+            seen.append(code)
+        # Walked the whole history without a match: every role has been read,
+        # so keep them packed and answer later lookups with one rfind.
+        seen.reverse()
+        object.__setattr__(self, "_roles", bytes(seen))
+        return -1
+
+    def content_lengths(self) -> array.array:
+        """Length of each message's content, parallel to `messages`.
+
+        Returned as array('i') so NumPy can wrap it without copying, e.g.
+        numpy.frombuffer(req.content_lengths(), dtype=numpy.int32).
+        """
+        return array.array("i", (len(_as_str(m.get("content", ""))) for m in self.messages))
+
+    def content_hashes(self) -> array.array:
+        """32-bit hash of each message's content, parallel to `messages`.
+
+        Returned as array('I'); hashes are only stable within one process
+        (one turn, or one session in persistent mode).
+        """
+        return array.array(
+            "I", (hash(_as_str(m.get("content", ""))) & 0xFFFFFFFF for m in self.messages)
+        )
 
 
-def reply(content: str) -> Dict[str, Any]:
-    return {"content": str(content)}
+def _role_code(value: Any) -> int:
+    if isinstance(value, str):
+        return _ROLE_CODES.get(value, _ROLE_OTHER)
+    return _ROLE_OTHER
+
+
+def _as_object(value: Any) -> Mapping[str, Any]:
+    # Anything that is not a JSON object (missing, list, scalar) counts as empty.
+    if isinstance(value, Mapping):
+        return value
+    if simdjson is not None and isinstance(value, simdjson.Object):
+        return value
+    return {}
+
+
+def _as_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if hasattr(value, "as_dict") or hasattr(value, "as_list"):
+        # simdjson proxies: stringify the plain value, not the proxy object
+        value = _plain(value)
+    return str(value)
+
+
+def _loads(raw: bytes) -> Any:
+    # simdjson returns lazy Object/Array proxies; Request.from_dict only relies
+    # on the Mapping API (.get, iteration), so they are passed through as-is.
+    if _parser is not None:
+        try:
+            return _parser.parse(raw)
+        except RuntimeError:
+            # The shared parser refuses to parse while documents from its last
+            # parse are still referenced (e.g. a Request kept across turns).
+            return simdjson.Parser().parse(raw)
+    if orjson is not None:
+        return orjson.loads(raw)
+    if isinstance(raw, bytes):
+        # json.loads(bytes) also sniffs UTF-16/32 and lets lone surrogates
+        # through; decode strictly so every parser enforces the same UTF-8.
+        raw = raw.decode("utf-8")
+    return json.loads(raw)
+
+
+def _plain(obj: Any) -> Any:
+    # Encoder fallback for simdjson Object/Array proxies taken from a request.
+    if hasattr(obj, "as_dict"):
+        return obj.as_dict()
+    if hasattr(obj, "as_list"):
+        return obj.as_list()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_plain, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_plain, separators=(",", ":")).encode("utf-8")
 
 
-def call_tool(name: str, arguments: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
-    return {"tool_call": {"name": str(name), "arguments": dict(arguments or {})}}
+def read_request() -> Request:
+    # Hand the parser raw bytes so input is not decoded to str first. Text-only
+    # replacements of sys.stdin (e.g. io.StringIO) have no .buffer; every
+    # parser accepts str as well.
+    stream = getattr(sys.stdin, "buffer", sys.stdin)
+    raw = stream.read()
+    return Request.from_dict(_loads(raw or b"{}"))
 
 
-def ask_user(message: str) -> Dict[str, Any]:
-    return {"ask_user": {"message": str(message)}}
+# Builders return the encoded response directly: the top-level shape is fixed,
+# so only the variable parts go through the JSON encoder.
+Payload = bytes
 
 
-def terminate(message: Optional[str] = None) -> Dict[str, Any]:
-    out: Dict[str, Any] = {"terminate": {}}
-    if message:
-        out["terminate"]["message"] = str(message)
-    return out
+def reply(content: str) -> Payload:
+    return b'{"content":' + _dumps(_as_str(content)) + b"}"
 
 
-def error(message: str) -> Dict[str, Any]:
-    return {"error": {"message": str(message)}}
+def call_tool(name: str, arguments: Optional[Mapping[str, Any]] = None) -> Payload:
+    # Only copy/coerce when needed: plain dicts and str are encoded as-is.
+    args = arguments if isinstance(arguments, dict) else dict(arguments or {})
+    return (
+        b'{"tool_call":{"name":'
+        + _dumps(_as_str(name))
+        + b',"arguments":'
+        + _dumps(args)
+        + b"}}"
+    )
 
 
-def emit(obj: Mapping[str, Any]) -> None:
-    sys.stdout.write(json.dumps(obj))
+def ask_user(message: str) -> Payload:
+    return b'{"ask_user":{"message":' + _dumps(_as_str(message)) + b"}}"
 
 
+def terminate(message: Optional[str] = None) -> Payload:
+    if message:
+        return b'{"terminate":{"message":' + _dumps(_as_str(message)) + b"}}"
+    return b'{"terminate":{}}'
+
+
+def error(message: str) -> Payload:
+    return b'{"error":{"message":' + _dumps(_as_str(message)) + b"}}"
+
+
+def _encode(obj: Union[Payload, Mapping[str, Any]]) -> Payload:
+    return obj if isinstance(obj, bytes) else _dumps(obj)
+
+
+def _write(payload: bytes) -> None:
+    # Anything printed earlier must reach the pipe first.
+    sys.stdout.flush()
+    try:
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError):
+        # Replaced stdout without a real fd (e.g. captured in tests).
+        stream = getattr(sys.stdout, "buffer", None)
+        if stream is not None:
+            stream.write(payload)
+        else:
+            sys.stdout.write(payload.decode("utf-8"))
+        return
+    view = memoryview(payload)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def emit(obj: Union[Payload, Mapping[str, Any]]) -> None:
+    _write(_encode(obj))
+
+
+_FRAME_BUFFER_SIZE = 1 << 20
+
+Handler = Callable[[Request], Union[Payload, Mapping[str, Any]]]
+
+
+def _answer(raw: bytes, handler: Handler) -> Payload:
+    try:
+        req = Request.from_dict(_loads(raw))
+    except Exception as e:
+        return error(f"Invalid input JSON: {e}")
+    try:
+        payload = _encode(handler(req))
+    except Exception as e:
+        return error(f"Runner error: {e}")
+    if b"\n" in payload:
+        # Pre-encoded multi-line JSON (e.g. indent=2) would break the line
+        # framing; re-encode it compactly.
+        try:
+            payload = _dumps(_loads(payload))
+        except Exception as e:
+            return error(f"Runner error: response is not valid JSON: {e}")
+    return payload
+
+
+def serve(handler: Handler) -> None:
+    """Answer requests until stdin closes (persistent mode).
+
+    Each line on stdin is one request and each response is written as one
+    line, so a single process serves a whole session. Handler responses must
+    therefore be single-line JSON; pre-encoded bytes containing newlines are
+    re-encoded compactly. Errors are reported per request and do not end the
+    loop.
+    """
+    try:
+        # A large read buffer lets a big request (long history, many tool
+        # schemas) arrive in a few read() calls instead of 8 KiB at a time.
+        stream = open(sys.stdin.fileno(), "rb", buffering=_FRAME_BUFFER_SIZE, closefd=False)
+    except (AttributeError, OSError):
+        stream = getattr(sys.stdin, "buffer", sys.stdin)
+    for line in stream:
+        if not line.strip():
+            continue
+        _write(_answer(line, handler) + b"\n")